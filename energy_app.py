@@ -1,7 +1,30 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-from io import BytesIO
+
+from helpers import (
+    READERS,
+    analyze,
+    downsample_for_chart,
+    generate_sample_df,
+    load_file,
+    to_csv_bytes,
+    to_xlsx_bytes,
+)
+
+THRESHOLD = 6.0
+REQUIRED_COLS = frozenset({"Час", "Потребление (кВт·ч)"})
+PREVIEW_LIMIT = 200
+PREVIEW_ROWS = 100
+CHART_MAX_POINTS = 3000
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+HEADER_MD = """
+# 🔋 **Energy Monitor**
+### Умный анализ энергопотребления и расчёт экономии для малого бизнеса
+
+📁 Загрузите данные в формате CSV, Excel или Parquet  
+📉 Получите визуализацию, пиковые часы и рекомендации  
+💸 Узнайте, сколько вы можете сэкономить
+"""
 
 # --------------------------- НАСТРОЙКИ СТРАНИЦЫ ---------------------------
 st.set_page_config(
@@ -11,71 +34,54 @@ st.set_page_config(
 )
 
 # --------------------------- ШАПКА И ОПИСАНИЕ ---------------------------
-st.markdown("""
-# 🔋 **Energy Monitor**
-### Умный анализ энергопотребления и расчёт экономии для малого бизнеса
-
-📁 Загрузите данные в формате CSV или Excel  
-📉 Получите визуализацию, пиковые часы и рекомендации  
-💸 Узнайте, сколько вы можете сэкономить
-""")
-
-# --------------------------- ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ ---------------------------
-def generate_sample_df() -> pd.DataFrame:
-    np.random.seed(42)
-    hours = list(range(24))
-    consumption = [
-        np.random.uniform(1.5, 2.5) if h < 6 or h > 22
-        else np.random.uniform(3.0, 4.5) if 6 <= h < 17
-        else np.random.uniform(6.0, 8.5)
-        for h in hours
-    ]
-    return pd.DataFrame({"Час": hours, "Потребление (кВт·ч)": consumption})
-
-
-def load_file(file) -> pd.DataFrame:
-    if file.name.endswith(".csv"):
-        return pd.read_csv(file)
-    return pd.read_excel(file)
+st.markdown(HEADER_MD)
 
 # --------------------------- ЗАГРУЗКА ДАННЫХ ---------------------------
 uploaded = st.file_uploader(
-    "Загрузите CSV или Excel с колонками «Час» и «Потребление (кВт·ч)»",
-    type=["csv", "xlsx"],
+    "Загрузите CSV, Excel или Parquet с колонками «Час» и «Потребление (кВт·ч)»",
+    type=[ext.lstrip(".") for ext in READERS],
 )
 
 if uploaded is None:
     st.info("Файл не выбран. Можно создать тестовые данные.")
-    if not st.button("Сгенерировать тестовые данные"):
+    if st.button("Сгенерировать тестовые данные"):
+        st.session_state["use_sample"] = True
+    if not st.session_state.get("use_sample"):
         st.stop()
     df = generate_sample_df()
+    source_id = "sample"
 else:
+    st.session_state.pop("use_sample", None)
     try:
-        df = load_file(uploaded)
+        df = load_file(uploaded.getvalue(), uploaded.name)
     except Exception as e:
         st.error(f"Не удалось прочитать файл: {e}")
         st.stop()
+    source_id = uploaded.file_id
 
 # --------------------------- ВАЛИДАЦИЯ ---------------------------
-required_cols = {"Час", "Потребление (кВт·ч)"}
-if not required_cols.issubset(df.columns):
-    st.error(f"В файле должны быть колонки: {', '.join(required_cols)}")
+if not REQUIRED_COLS.issubset(df.columns):
+    st.error(f"В файле должны быть колонки: {', '.join(REQUIRED_COLS)}")
     st.stop()
 
 # --------------------------- АНАЛИЗ ---------------------------
-THRESHOLD = 6.0
-df["Пик?"] = df["Потребление (кВт·ч)"] > THRESHOLD
-df["Рекомендация"] = np.where(df["Пик?"], "Перенести нагрузку на ночь", "")
+df, total_kwh, peak_kwh = analyze(df, THRESHOLD)
 
 # --------------------------- ВИЗУАЛИЗАЦИЯ ---------------------------
 st.subheader("📊 Загруженные данные")
-st.dataframe(df, use_container_width=True)
+if len(df) <= PREVIEW_LIMIT or st.checkbox("Показать всё"):
+    preview = df
+else:
+    preview = df.head(PREVIEW_ROWS)
+    st.caption(f"Показаны первые {PREVIEW_ROWS} из {len(df)} строк")
+st.dataframe(preview, use_container_width=True, hide_index=True)
 
 st.subheader("📈 График потребления за сутки")
-st.line_chart(df.set_index("Час")["Потребление (кВт·ч)"])
+plot_df = downsample_for_chart(df) if len(df) > CHART_MAX_POINTS else df
+st.line_chart(plot_df, x="Час", y="Потребление (кВт·ч)")
 
-st.subheader("⏰ Часы пиковых нагрузок (> 6 кВт·ч)")
-peaks = df.loc[df["Пик?"], "Час"].tolist()
+st.subheader(f"⏰ Часы пиковых нагрузок (> {THRESHOLD:g} кВт·ч)")
+peaks = df["Час"].to_numpy()[df["Пик?"].to_numpy()].tolist()
 if peaks:
     st.write(peaks)
     st.write("🔌 Рекомендуется перенести работу мощного оборудования на ночные или утренние часы.")
@@ -83,35 +89,45 @@ else:
     st.write("✅ Пиков не обнаружено. Распределение нагрузки сбалансировано.")
 
 # --------------------------- ЭКОНОМИЯ ---------------------------
-st.subheader("💸 Потенциальная экономия")
-tarif = st.number_input(
-    "Введите тариф (₽ за 1 кВт·ч):", min_value=0.0, value=6.5, step=0.1)
+@st.fragment
+def economy_block(total_kwh: float, peak_kwh: float) -> None:
+    tarif = st.number_input(
+        "Введите тариф (₽ за 1 кВт·ч):", min_value=0.0, value=6.5, step=0.1)
+
+    if tarif > 0:
+        total_cost = total_kwh * tarif
+        # ночной тариф на 20% ниже, поэтому экономия — 20% стоимости пиковых кВт·ч
+        economy = peak_kwh * tarif * 0.2
+        optimized_cost = total_cost - economy
+        percent = (economy / total_cost * 100) if total_cost > 0 else 0
 
-if tarif > 0:
-    total_kwh = df["Потребление (кВт·ч)"].sum()
-    total_cost = total_kwh * tarif
-    night_tarif = tarif * 0.8
-    peak_kwh = df.loc[df["Пик?"], "Потребление (кВт·ч)"].sum()
-    optimized_cost = total_cost - peak_kwh * tarif + peak_kwh * night_tarif
-    economy = total_cost - optimized_cost
-    percent = (economy / total_cost * 100) if total_cost > 0 else 0
+        col1, col2 = st.columns(2)
+        col1.metric("Текущая стоимость", f"{total_cost:,.2f} ₽")
+        col2.metric("Оптимизированная", f"{optimized_cost:,.2f} ₽", delta=f"-{economy:,.2f} ₽")
 
-    col1, col2 = st.columns(2)
-    col1.metric("Текущая стоимость", f"{total_cost:,.2f} ₽")
-    col2.metric("Оптимизированная", f"{optimized_cost:,.2f} ₽", delta=f"-{economy:,.2f} ₽")
+        st.success(f"💰 Вы можете сэкономить: **{economy:,.2f} ₽ ({percent:.1f}%)**")
 
-    st.success(f"💰 Вы можете сэкономить: **{economy:,.2f} ₽ ({percent:.1f}%)**")
+        if percent > 10:
+            st.info("📌 Совет: установите таймеры или ИБП, чтобы автоматически снижать пиковую нагрузку.")
 
-    if percent > 10:
-        st.info("📌 Совет: установите таймеры или ИБП, чтобы автоматически снижать пиковую нагрузку.")
+
+st.subheader("💸 Потенциальная экономия")
+economy_block(total_kwh, peak_kwh)
 
 # --------------------------- СКАЧИВАНИЕ ---------------------------
 with st.expander("⬇️ Скачать таблицу с результатами"):
-    buf = BytesIO()
-    df.to_excel(buf, index=False)
     st.download_button(
-        "Скачать Excel",
-        data=buf.getvalue(),
-        file_name="energy_analysis.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        "Скачать CSV",
+        data=to_csv_bytes(df),
+        file_name="energy_analysis.csv",
+        mime="text/csv"
     )
+    if st.button("Подготовить Excel", key="prep_xlsx"):
+        st.session_state["xlsx_for"] = source_id
+    if st.session_state.get("xlsx_for") == source_id:
+        st.download_button(
+            "Скачать Excel",
+            data=to_xlsx_bytes(df),
+            file_name="energy_analysis.xlsx",
+            mime=XLSX_MIME
+        )
@@ -0,0 +1,112 @@
+import os
+import pickle
+from functools import partial
+from io import BytesIO
+
+import numba
+import streamlit as st
+import pandas as pd
+import numpy as np
+from tsdownsample import LTTBDownsampler
+
+REC_TEXT = "Перенести нагрузку на ночь"
+
+
+def _frame_hash(df: pd.DataFrame) -> tuple:
+    # st.cache_data хеширует лишь выборку строк у больших фреймов,
+    # поэтому для результатов анализа хешируем все ячейки
+    try:
+        cells = pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes()
+    except TypeError:
+        # нехешируемые ячейки (списки, массивы из Parquet) — как в Streamlit
+        cells = pickle.dumps(df)
+    return tuple(df.columns), tuple(map(str, df.dtypes)), cells
+
+
+FULL_FRAME_HASH = {pd.DataFrame: _frame_hash}
+
+
+@st.cache_data
+def generate_sample_df() -> pd.DataFrame:
+    rng = np.random.default_rng(42)
+    hours = np.arange(24)
+    night = (hours < 6) | (hours > 22)
+    low = np.where(night, 1.5, np.where(hours < 17, 3.0, 6.0))
+    high = np.where(night, 2.5, np.where(hours < 17, 4.5, 8.5))
+    consumption = rng.uniform(low, high)
+    return pd.DataFrame({"Час": hours, "Потребление (кВт·ч)": consumption})
+
+
+READERS = {
+    ".csv": partial(pd.read_csv, engine="pyarrow"),
+    ".xlsx": partial(pd.read_excel, engine="calamine"),
+    ".parquet": pd.read_parquet,
+}
+
+
+@st.cache_data
+def load_file(file_bytes: bytes, name: str) -> pd.DataFrame:
+    ext = os.path.splitext(name)[1].lower()
+    return READERS[ext](BytesIO(file_bytes))
+
+
+NUMBA_MIN_ROWS = 4096
+
+
+@numba.njit(parallel=True, fastmath={"reassoc", "contract"}, cache=True)
+def _analyze_kernel(arr, threshold):
+    n = arr.size
+    mask = np.empty(n, dtype=np.bool_)
+    total = 0.0
+    peak = 0.0
+    for i in numba.prange(n):
+        v = arr[i]
+        m = v > threshold
+        mask[i] = m
+        total += v if v == v else 0.0  # v != v только для NaN
+        peak += v if m else 0.0
+    return mask, total, peak
+
+
+def _analyze_numpy(arr, threshold):
+    mask = arr > threshold
+    # пустые ячейки (NaN) пропускаются, как в pandas .sum()
+    total = np.nansum(arr)
+    peak = arr[mask].sum()  # NaN > threshold == False, в маску не попадает
+    return mask, total, peak
+
+
+@st.cache_data(hash_funcs=FULL_FRAME_HASH)
+def analyze(df: pd.DataFrame, threshold: float) -> tuple[pd.DataFrame, float, float]:
+    arr = df["Потребление (кВт·ч)"].to_numpy()
+    if arr.size >= NUMBA_MIN_ROWS:
+        mask, total_kwh, peak_kwh = _analyze_kernel(arr.astype(np.float64, copy=False), threshold)
+    else:
+        mask, total_kwh, peak_kwh = _analyze_numpy(arr, threshold)
+    total_kwh, peak_kwh = float(total_kwh), float(peak_kwh)
+    df = df.copy()
+    df["Пик?"] = mask
+    df["Рекомендация"] = pd.Categorical.from_codes(
+        mask.view(np.int8), categories=["", REC_TEXT]
+    )
+    return df, total_kwh, peak_kwh
+
+
+@st.cache_data(hash_funcs=FULL_FRAME_HASH)
+def downsample_for_chart(df: pd.DataFrame, n_out: int = 2000) -> pd.DataFrame:
+    y = np.ascontiguousarray(df["Потребление (кВт·ч)"].to_numpy(dtype=np.float64))
+    idx = LTTBDownsampler().downsample(y, n_out=n_out)
+    return df.iloc[idx]
+
+
+@st.cache_data(hash_funcs=FULL_FRAME_HASH)
+def to_csv_bytes(df: pd.DataFrame) -> bytes:
+    return df.to_csv(index=False).encode("utf-8")
+
+
+@st.cache_data(hash_funcs=FULL_FRAME_HASH)
+def to_xlsx_bytes(df: pd.DataFrame) -> bytes:
+    buf = BytesIO()
+    with pd.ExcelWriter(buf, engine="xlsxwriter") as writer:
+        df.to_excel(writer, index=False)
+    return buf.getvalue()
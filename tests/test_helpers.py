@@ -0,0 +1,69 @@
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+from helpers import (
+    _analyze_kernel,
+    _analyze_numpy,
+    analyze,
+    generate_sample_df,
+    to_xlsx_bytes,
+)
+
+
+def test_xlsx_roundtrip_keeps_all_cells():
+    df, _, _ = analyze(generate_sample_df(), 6.0)
+
+    back = pd.read_excel(BytesIO(to_xlsx_bytes(df)), engine="calamine")
+
+    expected = df.astype({"Рекомендация": str})
+    back["Рекомендация"] = back["Рекомендация"].fillna("")
+    pd.testing.assert_frame_equal(back, expected, check_dtype=False)
+
+
+def test_analyze_skips_missing_values():
+    df = pd.DataFrame({"Час": [0, 1, 2], "Потребление (кВт·ч)": [2.0, None, 15.0]})
+
+    out, total_kwh, peak_kwh = analyze(df, 6.0)
+
+    assert total_kwh == 17.0
+    assert peak_kwh == 15.0
+    assert out["Пик?"].tolist() == [False, False, True]
+
+
+def test_kernel_matches_numpy_path():
+    arr = np.random.default_rng(0).uniform(0.0, 10.0, size=100_000)
+    arr[[5, 50_000]] = np.nan
+
+    mask, total, peak = _analyze_kernel(arr, 6.0)
+    np_mask, np_total, np_peak = _analyze_numpy(arr, 6.0)
+
+    np.testing.assert_array_equal(mask, np_mask)
+    np.testing.assert_allclose(total, np_total)
+    np.testing.assert_allclose(peak, np_peak)
+
+
+def test_analyze_cache_sees_changes_in_large_frames():
+    n = 60_000
+    df = pd.DataFrame({"Час": np.arange(n), "Потребление (кВт·ч)": np.ones(n)})
+    edited = df.copy()
+    edited.iloc[n // 2, 1] = 10.0
+
+    _, total, _ = analyze(df, 6.0)
+    _, edited_total, _ = analyze(edited, 6.0)
+
+    assert edited_total == total + 9.0
+
+
+def test_analyze_accepts_list_valued_columns():
+    df = pd.DataFrame({
+        "Час": [0, 1],
+        "Потребление (кВт·ч)": [2.0, 8.0],
+        "meta": [np.array([1, 2]), np.array([3])],
+    })
+
+    out, total_kwh, peak_kwh = analyze(df, 6.0)
+
+    assert (total_kwh, peak_kwh) == (10.0, 8.0)
+    assert out["Пик?"].tolist() == [False, True]